@@ -1,6 +1,8 @@
 import os
 import requests
 import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Your Asana Personal Access Token from environment variable
 ASANA_TOKEN = os.environ.get('ASANA_TOKEN')
@@ -9,6 +11,17 @@ REPAIR_PROJECT_ID = os.environ.get('REPAIR_PROJECT_ID')
 # Your Railway app URL
 APP_URL = os.environ.get('APP_URL') 
 
+# Pooled session so repeated Asana calls reuse the same keep-alive TLS connection.
+# Retries cover connection failures only: the one call here is a POST, which
+# urllib3 does not retry on status, and re-sending it could register the
+# webhook twice.
+_session = requests.Session()
+_session.mount("https://app.asana.com", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3)
+))
+
 def create_webhook():
     # Endpoint URL
     url = "https://app.asana.com/api/1.0/webhooks"
@@ -35,7 +48,7 @@ def create_webhook():
     }
     
     # Make the request
-    response = requests.post(url, headers=headers, json=webhook_data)
+    response = _session.post(url, headers=headers, json=webhook_data)
     
     # Print the response
     print(f"Status code: {response.status_code}")
@@ -1,43 +1,118 @@
-from flask import Flask, request, jsonify
-from datetime import datetime, timedelta
+from flask import Flask, Response, request, jsonify, stream_with_context
+from flask.json import JSONEncoder
+from flask_compress import Compress
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from repair_workflow import (
     client, 
+    fetch_task,
+    fetch_tasks,
+    BATCH_ACTION_LIMIT,
     process_repair_request, 
-    is_repair_form_task, 
+    classify_task, 
+    custom_field_value,
     REPAIR_PROJECT_ID, 
-    send_email_notification
+    TASK_OPT_FIELDS,
+    queue_email_notification
 )
 import os
+import time
+import hmac
+import hashlib
+import itertools
+import logging
+from string import Template
+import queue
+import threading
+from cachetools import TTLCache, cached
+import orjson
+import webhook_secrets
+
+logger = logging.getLogger(__name__)
+
+class OrjsonEncoder(JSONEncoder):
+    """JSON encoder that serializes jsonify() payloads with orjson"""
+
+    def encode(self, o):
+        # Pretty-printed output (debug mode) keeps the stdlib formatting
+        if self.indent is not None:
+            return super().encode(o)
+        option = orjson.OPT_SORT_KEYS if self.sort_keys else 0
+        try:
+            return orjson.dumps(o, option=option).decode()
+        except TypeError:
+            return super().encode(o)
 
 app = Flask(__name__)
+app.json_encoder = OrjsonEncoder
 
-@app.route('/', methods=['GET'])
-def home():
-    """Landing page with info and links"""
-    html_response = """
+# Compress HTML/JSON responses over 512 bytes. Streamed pages (/debug-simple)
+# are left uncompressed so they keep flushing task blocks as they arrive.
+app.config['COMPRESS_MIN_SIZE'] = 512
+app.config['COMPRESS_LEVEL'] = 5
+app.config['COMPRESS_STREAMS'] = False
+Compress(app)
+
+# Asana's maximum page size; the SDK default of 50 doubles the round-trips
+ASANA_PAGE_SIZE = 100
+
+# Footer timestamp shown on the HTML pages
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Handshake secrets are persisted per watched resource so every worker process
+# sees them; X_HOOK_SECRET seeds the store for webhooks registered elsewhere
+WEBHOOK_RESOURCE = REPAIR_PROJECT_ID
+if os.environ.get('X_HOOK_SECRET') and not webhook_secrets.get_secret(WEBHOOK_RESOURCE):
+    webhook_secrets.set_secret(WEBHOOK_RESOURCE, os.environ['X_HOOK_SECRET'])
+
+# Webhook task gids are queued and acknowledged immediately; background workers
+# do the Asana/SMTP work so slow downstream calls never delay the ack (Asana
+# retries deliveries that are not acknowledged quickly).
+WORK_Q = queue.Queue(maxsize=10000)
+
+# Kept below the Asana session's pool_maxsize so every worker gets a pooled
+# connection, and small enough not to trip Asana's rate limits.
+WEBHOOK_WORKERS = 8
+
+# Recently seen webhook events, so Asana redeliveries are acknowledged without
+# being processed again. Bounded so memory stays flat during bursts.
+SEEN_EVENTS = TTLCache(maxsize=50000, ttl=7200)
+SEEN_EVENTS_LOCK = threading.Lock()
+
+# Tasks queued in the last ten minutes. Separate deliveries about the same new
+# task (added to the project, then to a section) would otherwise race two
+# workers through process_repair_request and duplicate its subtasks and email.
+# Guarded by SEEN_EVENTS_LOCK.
+RECENT_TASKS = TTLCache(maxsize=4096, ttl=600)
+
+# Static pages are parsed once at import; handlers only substitute the
+# timestamp/count instead of rebuilding the whole document per request.
+PAGE_STYLE = """
+    body { font-family: Arial, sans-serif; margin: 40px; line-height: 1.6; }
+    .container { max-width: 600px; margin: 0 auto; }
+    h1 { color: #333; }
+    .button { 
+        display: inline-block; 
+        background: #4CAF50; 
+        color: white; 
+        padding: 10px 20px; 
+        text-decoration: none; 
+        border-radius: 4px; 
+        margin: 10px; 
+        text-align: center;
+    }
+    .grid { 
+        display: flex; 
+        flex-wrap: wrap; 
+        justify-content: center; 
+    }
+    """
+
+HOME_TMPL = Template(f"""
     <html>
     <head>
         <title>Property Repair Management</title>
-        <style>
-            body { font-family: Arial, sans-serif; margin: 40px; line-height: 1.6; }
-            .container { max-width: 600px; margin: 0 auto; }
-            h1 { color: #333; }
-            .button { 
-                display: inline-block; 
-                background: #4CAF50; 
-                color: white; 
-                padding: 10px 20px; 
-                text-decoration: none; 
-                border-radius: 4px; 
-                margin: 10px; 
-                text-align: center;
-            }
-            .grid { 
-                display: flex; 
-                flex-wrap: wrap; 
-                justify-content: center; 
-            }
-        </style>
+        <style>{PAGE_STYLE}</style>
     </head>
     <body>
         <div class="container">
@@ -50,23 +125,42 @@ def home():
             </div>
             
             <hr>
-            <p>Current time: """ + datetime.now().strftime("%Y-%m-%d %H:%M:%S") + """</p>
+            <p>Current time: $ts</p>
         </div>
     </body>
     </html>
-    """
-    return html_response
+    """)
 
-@app.route('/manual-trigger', methods=['GET'])
-def manual_trigger():
-    """User-friendly endpoint to manually trigger processing of recent tasks"""
-    try:
-        html_response = """
+MANUAL_TMPL = Template(f"""
         <html>
         <head>
             <title>Property Repair Management</title>
+            <style>{PAGE_STYLE}</style>
+        </head>
+        <body>
+            <div class="container">
+                <h1>🔧 Property Repair Management</h1>
+                <p>Use this page to manually trigger actions for the repair management system.</p>
+                
+                <div class="grid">
+                    <a href="/process-recent" class="button">Process Recent Repair Requests</a>
+                    <a href="/test-email" class="button">Send Test Email</a>
+                </div>
+                
+                <hr>
+                <p>Current time: $ts</p>
+            </div>
+        </body>
+        </html>
+        """)
+
+PROCESS_RECENT_TMPL = Template("""
+        <html>
+        <head>
+            <title>Recent Tasks Processed</title>
             <style>
                 body { font-family: Arial, sans-serif; margin: 40px; line-height: 1.6; }
+                .success { color: green; font-weight: bold; }
                 .container { max-width: 600px; margin: 0 auto; }
                 h1 { color: #333; }
                 .button { 
@@ -76,33 +170,38 @@ def manual_trigger():
                     padding: 10px 20px; 
                     text-decoration: none; 
                     border-radius: 4px; 
-                    margin: 10px; 
-                    text-align: center;
-                }
-                .grid { 
-                    display: flex; 
-                    flex-wrap: wrap; 
-                    justify-content: center; 
+                    margin-top: 20px; 
                 }
             </style>
         </head>
         <body>
             <div class="container">
-                <h1>🔧 Property Repair Management</h1>
-                <p>Use this page to manually trigger actions for the repair management system.</p>
-                
-                <div class="grid">
-                    <a href="/process-recent" class="button">Process Recent Repair Requests</a>
-                    <a href="/test-email" class="button">Send Test Email</a>
-                </div>
-                
-                <hr>
-                <p>Current time: """ + datetime.now().strftime("%Y-%m-%d %H:%M:%S") + """</p>
+                <h1>Recent Tasks Processed</h1>
+                <p class="success">✅ Processed $processed_count recent repair request tasks</p>
+                <p>The system has checked for recent repair requests and processed them.</p>
+                <p>Current time: $ts</p>
+                <a href="/manual-trigger" class="button">Back to Main Menu</a>
             </div>
         </body>
         </html>
-        """
-        return html_response
+        """)
+
+def _html_response(body):
+    """Wrap a rendered page (or a stream of fragments) as uncached HTML"""
+    response = Response(body, mimetype='text/html')
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@app.route('/', methods=['GET'])
+def home():
+    """Landing page with info and links"""
+    return _html_response(HOME_TMPL.substitute(ts=datetime.now().strftime(TIMESTAMP_FORMAT)))
+
+@app.route('/manual-trigger', methods=['GET'])
+def manual_trigger():
+    """User-friendly endpoint to manually trigger processing of recent tasks"""
+    try:
+        return _html_response(MANUAL_TMPL.substitute(ts=datetime.now().strftime(TIMESTAMP_FORMAT)))
     except Exception as e:
         return f"Error: {str(e)}", 500
 
@@ -127,13 +226,13 @@ def test_email():
         # Simulate a fake task GID for testing
         test_task_gid = 'test_task_12345'
         
-        # Send test email
-        send_email_notification(test_details, test_task_gid)
+        # Queue test email; delivery failures are logged by the sender
+        queue_email_notification(test_details, test_task_gid)
         
         return jsonify({
             "status": "success", 
-            "message": "Test email sent successfully"
-        }), 200
+            "message": "Test email queued for delivery"
+        }), 202
     except Exception as e:
         return jsonify({
             "status": "error", 
@@ -148,13 +247,183 @@ def health():
         "timestamp": datetime.now().isoformat()
     }), 200
 
+def _handle_tasks(task_gids):
+    """Fetch tasks named by webhook events and process the repair requests among them"""
+    try:
+        tasks = fetch_tasks(task_gids)
+    except Exception as e:
+        logger.error("Failed to fetch webhook tasks %s: %s", ', '.join(task_gids), e)
+        return
+    
+    for task_gid in task_gids:
+        task = tasks.get(task_gid)
+        if task is None:
+            continue
+        try:
+            repair_details = classify_task(task)
+            if repair_details is not None and process_repair_request(task, repair_details) is not True:
+                # Failed or still in flight elsewhere; let a later delivery re-queue it
+                with SEEN_EVENTS_LOCK:
+                    RECENT_TASKS.pop(task_gid, None)
+        except Exception as e:
+            logger.error("Failed to handle webhook event for task %s: %s", task_gid, e)
+
+def _event_key(event):
+    """Identity of a webhook event across redeliveries"""
+    user = event.get('user')
+    # Stringified so a malformed event cannot make the key unhashable
+    return (
+        str(user.get('gid')) if isinstance(user, dict) else None,
+        str(event.get('created_at')),
+        event['resource']['gid'],
+        event.get('action')
+    )
+
+def _worker():
+    """Consume queued task gids forever"""
+    while True:
+        task_gids = [WORK_Q.get()]
+        # With a backlog deeper than the pool, take a share of it and load the
+        # tasks through one batch call; otherwise keep one task per worker so
+        # the pool processes them in parallel
+        share = min(WORK_Q.qsize() // WEBHOOK_WORKERS, BATCH_ACTION_LIMIT - 1)
+        for _ in range(share):
+            try:
+                task_gids.append(WORK_Q.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            _handle_tasks(task_gids)
+        finally:
+            for _ in task_gids:
+                WORK_Q.task_done()
+
+for _ in range(WEBHOOK_WORKERS):
+    threading.Thread(target=_worker, daemon=True).start()
+
+# (secret, keyed HMAC) for the current handshake secret. Copying the keyed
+# context skips re-deriving the padded key on every delivery; the pair is
+# swapped as a whole when the secret changes.
+_hmac_base = (None, None)
+
+def _valid_signature(raw_body, signature):
+    """Check X-Hook-Signature (hex HMAC-SHA256 of the body) against the stored secret"""
+    global _hmac_base
+    secret = webhook_secrets.get_secret(WEBHOOK_RESOURCE)
+    if not secret:
+        # Without the handshake secret no delivery can be verified
+        return False
+    base_secret, base = _hmac_base
+    if base_secret != secret:
+        base = hmac.new(secret.encode(), digestmod=hashlib.sha256)
+        _hmac_base = (secret, base)
+    mac = base.copy()
+    mac.update(raw_body)
+    # Compare bytes: compare_digest raises TypeError on non-ASCII str input
+    return hmac.compare_digest(signature.encode(), mac.hexdigest().encode())
+
+@app.route('/webhook', methods=['POST'])
+def handle_webhook():
+    """Asana webhook handler"""
+    # Handshake: Asana sends X-Hook-Secret once and expects it echoed back. The
+    # request is unauthenticated, so it is only accepted while no secret is
+    # stored; otherwise anyone could swap in their own signing key.
+    secret = request.headers.get('X-Hook-Secret')
+    if secret:
+        if not webhook_secrets.add_secret(WEBHOOK_RESOURCE, secret):
+            logger.warning("Rejected webhook handshake: a secret is already stored")
+            return jsonify({
+                "status": "error", 
+                "message": "Webhook already registered"
+            }), 409
+        response = jsonify({"status": "success", "message": "Webhook handshake complete"})
+        response.headers['X-Hook-Secret'] = secret
+        return response, 200
+    
+    # Verify the signature over the raw body before spending any work on parsing
+    raw = request.get_data()
+    if not _valid_signature(raw, request.headers.get('X-Hook-Signature', '')):
+        logger.warning("Rejected webhook delivery with invalid signature")
+        return jsonify({
+            "status": "error", 
+            "message": "Invalid signature"
+        }), 401
+    
+    try:
+        payload = orjson.loads(raw) if raw else {}
+    except orjson.JSONDecodeError:
+        payload = None
+    if not isinstance(payload, dict):
+        return jsonify({
+            "status": "error", 
+            "message": "Malformed JSON body"
+        }), 400
+    events = payload.get('events', [])
+    if not isinstance(events, list):
+        return jsonify({
+            "status": "error", 
+            "message": "Malformed JSON body"
+        }), 400
+    
+    # Only new 'added' task events trigger work, and events for the same task in
+    # one delivery (e.g. added to the project and to a section) share one fetch.
+    # Comment, field-change and subtask events never start a repair, so they
+    # are dropped here without a lookup. Entries not shaped like task events
+    # are skipped the same way, so one bad entry cannot fail the delivery.
+    event_keys = {}
+    for event in events:
+        if not isinstance(event, dict):
+            continue
+        resource = event.get('resource')
+        if not isinstance(resource, dict) or not isinstance(resource.get('gid'), str):
+            continue
+        if event.get('action') != 'added' or resource.get('resource_type') != 'task':
+            continue
+        parent = event.get('parent')
+        if isinstance(parent, dict) and parent.get('resource_type') == 'task':
+            continue
+        event_keys.setdefault(resource['gid'], []).append(_event_key(event))
+    
+    queued = 0
+    try:
+        with SEEN_EVENTS_LOCK:
+            for task_gid, keys in event_keys.items():
+                keys = [key for key in keys if key not in SEEN_EVENTS]
+                if not keys:
+                    continue
+                if task_gid not in RECENT_TASKS:
+                    # Only remember events whose task actually made it onto the queue
+                    WORK_Q.put_nowait(task_gid)
+                    RECENT_TASKS[task_gid] = True
+                    queued += 1
+                for key in keys:
+                    SEEN_EVENTS[key] = True
+    except queue.Full:
+        # Let Asana redeliver later rather than blocking the request
+        logger.error("Webhook work queue is full; rejecting delivery")
+        return jsonify({
+            "status": "error", 
+            "message": "Webhook queue is full"
+        }), 503
+    
+    return jsonify({
+        "status": "queued", 
+        "message": f"Queued {queued} tasks from {len(events)} events"
+    }), 200
+
 @app.route('/process-task/<task_gid>', methods=['GET'])
 def process_specific_task(task_gid):
     """Manually process a specific task"""
     try:
-        task = client.tasks.find_by_id(task_gid)
-        if is_repair_form_task(task):
-            success = process_repair_request(task)
+        task = fetch_task(task_gid)
+        repair_details = classify_task(task)
+        if repair_details is not None:
+            success = process_repair_request(task, repair_details)
+            if success is None:
+                return jsonify({
+                    "status": "error", 
+                    "message": f"Task {task_gid} is already being processed"
+                }), 409
             if success:
                 return jsonify({
                     "status": "success", 
@@ -176,127 +445,233 @@ def process_specific_task(task_gid):
             "message": f"Error: {str(e)}"
         }), 500
 
+# /process-recent rescans the whole project. Requests that overlap or arrive
+# within a few seconds of each other share one scan instead of each
+# re-listing and re-checking every task.
+PROCESS_RECENT_LOCK = threading.Lock()
+PROCESS_RECENT_COALESCE_SECONDS = 10
+_last_recent_run = {'finished': 0.0, 'processed_count': 0}
+
+# Like WEBHOOK_WORKERS, sized so webhook and bulk workers together stay
+# within the Asana session's connection pool
+PROCESS_RECENT_WORKERS = 8
+
+# The repair fields plus modified_at, which lets rescans skip unchanged tasks
+RECENT_TASK_OPT_FIELDS = TASK_OPT_FIELDS + ',modified_at'
+
+# modified_at of each non-repair task as of the last scan that finished with
+# it. A task that has not changed since is skipped, saving the story lookup
+# that process_repair_request would otherwise repeat on every scan of the
+# window. Processing bumps modified_at itself, so processed tasks are recorded
+# as _PROCESSED instead and count as processed on later scans without a lookup.
+RECENT_MODIFIED_AT = TTLCache(maxsize=10000, ttl=2 * 24 * 3600)
+RECENT_MODIFIED_AT_LOCK = threading.Lock()
+_PROCESSED = object()
+
+def _process_if_repair(task):
+    """Process a listed task if it is a repair request; True if processed"""
+    task_gid, modified_at = task['gid'], task.get('modified_at')
+    with RECENT_MODIFIED_AT_LOCK:
+        recorded = RECENT_MODIFIED_AT.get(task_gid)
+    if recorded is _PROCESSED:
+        return True
+    if modified_at and recorded == modified_at:
+        return False
+    
+    repair_details = classify_task(task)
+    if repair_details is None:
+        processed = False
+    else:
+        processed = process_repair_request(task, repair_details)
+        if not processed:
+            # Leave failures, and tasks another run still has in flight,
+            # unrecorded so the next scan checks them again
+            return False
+    
+    with RECENT_MODIFIED_AT_LOCK:
+        RECENT_MODIFIED_AT[task_gid] = _PROCESSED if processed else modified_at
+    return processed
+
+def _process_recent_tasks(since):
+    """Process repair requests modified since the given ISO timestamp"""
+    # Hydrated with the fields the repair checks need so no per-task lookup is
+    # required; completed tasks are closed out and filtered server-side
+    tasks = client.tasks.find_all({
+        'project': REPAIR_PROJECT_ID,
+        'modified_since': since,
+        'completed_since': 'now',
+        'opt_fields': RECENT_TASK_OPT_FIELDS
+    }, page_size=ASANA_PAGE_SIZE)
+    
+    # Each task's processing is independent and bound by Asana/SMTP round-trips.
+    # Submit as pages stream in, keeping only a small window in flight rather
+    # than materializing every task up front the way pool.map would.
+    processed_count = 0
+    pending = set()
+    with ThreadPoolExecutor(max_workers=PROCESS_RECENT_WORKERS) as pool:
+        for task in tasks:
+            pending.add(pool.submit(_process_if_repair, task))
+            if len(pending) >= 2 * PROCESS_RECENT_WORKERS:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                processed_count += sum(f.result() for f in done)
+        processed_count += sum(f.result() for f in pending)
+    return processed_count
+
 @app.route('/process-recent', methods=['GET'])
 def process_recent():
     """Process recent tasks from the repair project"""
     try:
-        # Get tasks created in the last 24 hours
-        tasks = client.tasks.find_all({
-            'project': REPAIR_PROJECT_ID,
-            'modified_since': (datetime.now() - timedelta(days=1)).isoformat()
-        })
+        # One clock read for both values. The cutoff carries an explicit UTC
+        # offset so the window does not depend on the host timezone; the
+        # footer shows local time as before.
+        now = datetime.now(timezone.utc)
+        since = (now - timedelta(days=1)).isoformat()
+        ts = now.astimezone().strftime(TIMESTAMP_FORMAT)
         
-        processed_count = 0
-        for task in tasks:
-            if is_repair_form_task(task):
-                if process_repair_request(task):
-                    processed_count += 1
+        # Get tasks created in the last 24 hours, unless a scan just finished
+        with PROCESS_RECENT_LOCK:
+            if time.monotonic() - _last_recent_run['finished'] < PROCESS_RECENT_COALESCE_SECONDS:
+                processed_count = _last_recent_run['processed_count']
+            else:
+                processed_count = _process_recent_tasks(since)
+                _last_recent_run['finished'] = time.monotonic()
+                _last_recent_run['processed_count'] = processed_count
         
-        html_response = f"""
-        <html>
-        <head>
-            <title>Recent Tasks Processed</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 40px; line-height: 1.6; }}
-                .success {{ color: green; font-weight: bold; }}
-                .container {{ max-width: 600px; margin: 0 auto; }}
-                h1 {{ color: #333; }}
-                .button {{ 
-                    display: inline-block; 
-                    background: #4CAF50; 
-                    color: white; 
-                    padding: 10px 20px; 
-                    text-decoration: none; 
-                    border-radius: 4px; 
-                    margin-top: 20px; 
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <h1>Recent Tasks Processed</h1>
-                <p class="success">✅ Processed {processed_count} recent repair request tasks</p>
-                <p>The system has checked for recent repair requests and processed them.</p>
-                <p>Current time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p>
-                <a href="/manual-trigger" class="button">Back to Main Menu</a>
-            </div>
-        </body>
-        </html>
-        """
-        return html_response
+        return _html_response(PROCESS_RECENT_TMPL.substitute(
+            processed_count=processed_count,
+            ts=ts
+        ))
     except Exception as e:
         return f"Error processing recent tasks: {str(e)}", 500
 
-@app.route('/debug-simple', methods=['GET'])
-def debug_simple():
-    """Simple debug endpoint for tasks"""
-    try:
-        # Get project info
-        project = client.projects.find_by_id(REPAIR_PROJECT_ID)
-        
-        # Get recent tasks
-        tasks = list(client.tasks.find_all({
-            'project': REPAIR_PROJECT_ID,
-            'opt_fields': 'name,notes,created_at,custom_fields,custom_fields.name,custom_fields.type,custom_fields.enum_value'
-        }))
-        
-        # Format HTML response
-        html = f"""
+# Project metadata changes rarely, so /debug-simple reuses it for ten minutes
+PROJECT_CACHE = TTLCache(maxsize=16, ttl=600)
+PROJECT_CACHE_LOCK = threading.Lock()
+
+@cached(PROJECT_CACHE, lock=PROJECT_CACHE_LOCK)
+def get_project(project_gid):
+    """Fetch a project's name, memoized per project gid"""
+    return client.projects.find_by_id(project_gid, {'opt_fields': 'name'})
+
+def _invalidate_project_cache():
+    """Drop memoized project metadata, e.g. after the project is renamed"""
+    with PROJECT_CACHE_LOCK:
+        PROJECT_CACHE.clear()
+
+# Fields rendered by /debug-simple
+DEBUG_TASK_OPT_FIELDS = ','.join([
+    'name',
+    'notes',
+    'created_at',
+    'custom_fields',
+    'custom_fields.name',
+    'custom_fields.type',
+    'custom_fields.enum_value',
+    'custom_fields.text_value'
+])
+
+DEBUG_STYLE = """
+                body { font-family: Arial, sans-serif; margin: 20px; }
+                .task { margin-bottom: 20px; padding: 10px; border: 1px solid #ddd; }
+                .field { margin: 5px 0; }
+            """
+
+DEBUG_HEADER_TMPL = Template(f"""
         <html>
         <head>
             <title>Simple Debug</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 20px; }}
-                .task {{ margin-bottom: 20px; padding: 10px; border: 1px solid #ddd; }}
-                .field {{ margin: 5px 0; }}
-            </style>
+            <style>{DEBUG_STYLE}</style>
         </head>
         <body>
             <h1>Project and Task Debug</h1>
             
             <h2>Project Information</h2>
             <p>Project ID: {REPAIR_PROJECT_ID}</p>
-            <p>Project Name: {project.get('name')}</p>
+            <p>Project Name: $project_name</p>
             
-            <h2>Tasks ({len(tasks)})</h2>
-        """
-        
-        # Add task information
-        for task in tasks:
-            html += f"""
+            <h2>Tasks</h2>
+        """)
+
+DEBUG_FOOTER_TMPL = Template("""
+            <p>Total tasks: $count</p>
+            <p><a href="/manual-trigger">Back to Main Menu</a></p>
+        </body>
+        </html>
+        """)
+
+def _render_debug_field(field):
+    """Render one custom field of a task for the debug page"""
+    value = custom_field_value(field)
+    
+    return f"""
+                <div class="field">
+                    <strong>{field.get('name')}</strong> ({field.get('type')}): {value}
+                </div>"""
+
+def _render_debug_task(task):
+    """Render one task block, custom fields included, for the debug page"""
+    custom_fields_html = "".join(
+        _render_debug_field(field) for field in task.get('custom_fields', [])
+    )
+    return f"""
             <div class="task">
                 <h3>{task.get('name')} (ID: {task.get('gid')})</h3>
                 <p>Created: {task.get('created_at')}</p>
                 <p>Has notes: {"Yes" if task.get('notes') else "No"}</p>
                 <h4>Custom Fields:</h4>
-            """
+                {custom_fields_html}
+            </div>"""
+
+@app.route('/invalidate-cache', methods=['GET'])
+def invalidate_cache():
+    """Manually refresh cached Asana metadata"""
+    _invalidate_project_cache()
+    return jsonify({
+        "status": "success", 
+        "message": "Cached Asana metadata cleared"
+    }), 200
+
+@app.route('/debug-simple', methods=['GET'])
+def debug_simple():
+    """Simple debug endpoint for tasks"""
+    try:
+        # Keep the listing lazy: pages are fetched as the response streams
+        tasks = client.tasks.find_all({
+            'project': REPAIR_PROJECT_ID,
+            'opt_fields': DEBUG_TASK_OPT_FIELDS
+        }, page_size=ASANA_PAGE_SIZE)
+        
+        # The project lookup and the first task page are independent round-trips,
+        # so issue them together instead of one after the other
+        with ThreadPoolExecutor(max_workers=2) as ex:
+            project_future = ex.submit(get_project, REPAIR_PROJECT_ID)
+            first_task_future = ex.submit(next, tasks, None)
+            project = project_future.result()
+            first_task = first_task_future.result()
+        if first_task is not None:
+            tasks = itertools.chain([first_task], tasks)
+        
+        def generate():
+            yield DEBUG_HEADER_TMPL.substitute(project_name=project.get('name'))
             
-            # Add custom field information
-            for field in task.get('custom_fields', []):
-                value = "None"
-                if field.get('type') == 'enum' and field.get('enum_value'):
-                    value = field.get('enum_value').get('name')
-                elif field.get('type') == 'text':
-                    value = field.get('text_value')
-                
-                html += f"""
-                <div class="field">
-                    <strong>{field.get('name')}</strong> ({field.get('type')}): {value}
-                </div>
-                """
+            # Add task information as each page arrives
+            count = 0
+            try:
+                for task in tasks:
+                    count += 1
+                    yield _render_debug_task(task)
+            except Exception as e:
+                # Headers are already sent, so report the failure inline
+                logger.error("Error streaming debug tasks: %s", e)
+                yield f"<p>Error listing tasks: {str(e)}</p>"
             
-            html += "</div>"
-        
-        html += """
-            <p><a href="/manual-trigger">Back to Main Menu</a></p>
-        </body>
-        </html>
-        """
+            yield DEBUG_FOOTER_TMPL.substitute(count=count)
         
-        return html
+        return _html_response(stream_with_context(generate()))
     except Exception as e:
         return f"Error debugging: {str(e)}", 500
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8080))
-    app.run(host='0.0.0.0', port=port)
+    # Threaded so a slow Asana call in one request doesn't block /health etc.
+    app.run(host='0.0.0.0', port=port, threaded=True)
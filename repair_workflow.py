@@ -1,21 +1,44 @@
 import os
+import atexit
+import re
 import logging
+from logging.handlers import QueueHandler, QueueListener
 import sys
+import socket
+import threading
+import queue
+import time
+import random
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from string import Template
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
 import asana
+import jinja2
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO, 
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('repair_workflow.log')
-    ]
-)
+# Configure logging. Handlers only enqueue records; a listener thread does the
+# console and file writes so request and worker threads never block on I/O.
+_log_queue = queue.Queue(-1)
+_log_handlers = [
+    logging.StreamHandler(sys.stdout),
+    logging.FileHandler('repair_workflow.log')
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+_queue_handler = QueueHandler(_log_queue)
+# The listener's handlers apply the full format; the queue only carries the message
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
+_log_listener = QueueListener(_log_queue, *_log_handlers)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
 # CONFIGURATION VARIABLES
@@ -23,6 +46,21 @@ ASANA_TOKEN = os.environ.get('ASANA_TOKEN')
 REPAIR_PROJECT_ID = os.environ.get('REPAIR_PROJECT_ID', '1209602262926911')
 SUBTASKS_PROJECT_ID = os.environ.get('SUBTASKS_PROJECT_ID', REPAIR_PROJECT_ID)
 
+# Task fields read by classify_task / process_repair_request. Requesting
+# them up front lets a single list or lookup call return fully hydrated tasks.
+TASK_OPT_FIELDS = ','.join([
+    'name',
+    'notes',
+    'parent',
+    'custom_fields.name',
+    'custom_fields.type',
+    'custom_fields.enum_value.name',
+    'custom_fields.text_value',
+    'custom_fields.number_value'
+])
+# The same fields as a list, the form /batch actions take them in
+TASK_OPT_FIELD_LIST = TASK_OPT_FIELDS.split(',')
+
 # Email Configuration
 EMAIL_CONFIG = {
     'user': os.environ.get('EMAIL_USER'),
@@ -32,8 +70,128 @@ EMAIL_CONFIG = {
     'distribution_list': os.environ.get('EMAIL_DISTRIBUTION_LIST', 'maintenance@yourcompany.com')
 }
 
+class KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter that enables TCP keep-alive on its pooled connections"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        ]
+        super().init_poolmanager(*args, **kwargs)
+
+class JitteredRetryClient(asana.Client):
+    """Asana client whose automatic retries back off with jitter
+
+    The SDK already retries 429s and 5xx responses, but every worker thread
+    sleeps the same fixed schedule and they all come back at once. Spreading
+    the sleeps keeps a burst of webhook workers from stampeding the API.
+    """
+
+    MAX_RETRY_DELAY = 30
+
+    def _handle_retryable_error(self, e, retry_count):
+        if isinstance(e, asana.error.RateLimitEnforcedError):
+            # Honor Retry-After, plus a little spread between waiting threads
+            time.sleep(e.retry_after + random.random())
+        else:
+            delay = min(self.RETRY_DELAY * (self.RETRY_BACKOFF ** retry_count), self.MAX_RETRY_DELAY)
+            time.sleep(delay / 2 + random.uniform(0, delay / 2))
+
 # Asana API setup - updated client initialization
-client = asana.Client.access_token(ASANA_TOKEN)
+client = JitteredRetryClient.access_token(ASANA_TOKEN)
+# Every route shares this client, so give its session a keep-alive pool large
+# enough that concurrent handlers reuse connections instead of re-handshaking.
+# The SDK already retries 429/5xx responses itself; the adapter only retries
+# dropped connections (and reads on idempotent requests) so the two don't stack.
+client.session.mount('https://', KeepAliveAdapter(
+    pool_maxsize=32,
+    max_retries=Retry(total=3, connect=3, read=2, status=0, backoff_factor=0.5)
+))
+
+# Hydrated tasks are reused briefly, so looking the same task up again (a
+# manual /process-task retry, a second webhook for it) skips the GET
+TASK_CACHE = TTLCache(maxsize=512, ttl=30)
+TASK_CACHE_LOCK = threading.Lock()
+
+@cached(TASK_CACHE, lock=TASK_CACHE_LOCK)
+def fetch_task(task_gid):
+    """Fetch a task with the fields the repair workflow reads"""
+    return client.tasks.find_by_id(task_gid, {'opt_fields': TASK_OPT_FIELDS})
+
+def invalidate_task(task_gid):
+    """Drop a task from TASK_CACHE after this process changes it"""
+    with TASK_CACHE_LOCK:
+        TASK_CACHE.pop(hashkey(task_gid), None)
+
+# Asana's /batch endpoint accepts at most ten actions per call
+BATCH_ACTION_LIMIT = 10
+
+# Errors meaning /batch itself was refused, so nothing in the chunk ran and
+# the actions can safely be sent individually instead
+BATCH_REJECTED_ERRORS = (
+    asana.error.InvalidRequestError,
+    asana.error.ForbiddenError,
+    asana.error.NotFoundError,
+    asana.error.PremiumOnlyError,
+)
+
+def _fetch_individually(task_gids, tasks):
+    """Load tasks one by one through fetch_task (and its SDK retries) into tasks"""
+    for task_gid in task_gids:
+        try:
+            tasks[task_gid] = fetch_task(task_gid)
+        except Exception as e:
+            logger.error("Failed to fetch task %s: %s", task_gid, e)
+
+def fetch_tasks(task_gids):
+    """Fetch several tasks at once, as a dict by gid; tasks that fail to load are left out
+
+    Cached tasks are served from TASK_CACHE. A single missing task goes through
+    fetch_task; several are loaded through /batch, ten per call, then cached
+    for fetch_task as well. If /batch is refused the chunk is fetched
+    individually.
+    """
+    tasks = {}
+    with TASK_CACHE_LOCK:
+        for task_gid in task_gids:
+            task = TASK_CACHE.get(hashkey(task_gid))
+            if task is not None:
+                tasks[task_gid] = task
+    missing = [task_gid for task_gid in task_gids if task_gid not in tasks]
+    if len(missing) == 1:
+        _fetch_individually(missing, tasks)
+        return tasks
+    
+    # Actions rate limited or failed server-side inside the batch; the SDK
+    # only retries whole requests, so these are re-fetched on their own
+    retry = []
+    for start in range(0, len(missing), BATCH_ACTION_LIMIT):
+        chunk = missing[start:start + BATCH_ACTION_LIMIT]
+        try:
+            results = client.batch_api.create_batch_request({'actions': [{
+                'method': 'get',
+                'relative_path': f'/tasks/{task_gid}',
+                'options': {'fields': TASK_OPT_FIELD_LIST}
+            } for task_gid in chunk]})
+        except BATCH_REJECTED_ERRORS as e:
+            logger.warning("Batch request rejected (%s); fetching %d tasks individually", e, len(chunk))
+            retry.extend(chunk)
+            continue
+        for task_gid, result in zip(chunk, results):
+            status = result.get('status_code', 500)
+            if status == 429 or status >= 500:
+                retry.append(task_gid)
+                continue
+            if status >= 300:
+                logger.error("Failed to fetch task %s: %s", task_gid, result.get('body'))
+                continue
+            task = result['body']['data']
+            tasks[task_gid] = task
+            with TASK_CACHE_LOCK:
+                TASK_CACHE[hashkey(task_gid)] = task
+    
+    _fetch_individually(retry, tasks)
+    return tasks
 
 # Repair Categories Configuration
 REPAIR_CATEGORIES = {
@@ -89,75 +247,59 @@ REPAIR_CATEGORIES = {
     }
 }
 
+# Shared by every worker thread, so freeze the configuration: read-only
+# mappings with tuple subtypes
+REPAIR_CATEGORIES = MappingProxyType({
+    category: MappingProxyType({**info, 'subtypes': tuple(info['subtypes'])})
+    for category, info in REPAIR_CATEGORIES.items()
+})
+
+# Emoji per category, flattened once for the task-name prefix
+CATEGORY_EMOJI = MappingProxyType({
+    category: info['emoji'] for category, info in REPAIR_CATEGORIES.items()
+})
+
+# Full subtask names per category, built once rather than per repair request
+CATEGORY_SUBTASK_NAMES = MappingProxyType({
+    category: tuple(f"{info['emoji']} {subtype}" for subtype in info['subtypes'])
+    for category, info in REPAIR_CATEGORIES.items()
+})
+
+# Custom-field name fragments that identify the category and urgency fields
+CATEGORY_FIELD_HINTS = ('category', 'issue')
+URGENCY_FIELD_HINTS = ('urgency', 'priority')
+
+# Keywords that suggest a task is a repair request, compiled once into a
+# single alternation so name/notes are each scanned in one pass
+REPAIR_KEYWORDS = re.compile('|'.join(map(re.escape, [
+    'repair', 'fix', 'broken', 'issue', 'not working', 'problem', 'maintenance'
+])))
+
+# How to read the value of each custom field type
+CUSTOM_FIELD_VALUE_GETTERS = {
+    'enum': lambda field: (field.get('enum_value') or {}).get('name'),
+    'text': lambda field: field.get('text_value'),
+    'number': lambda field: field.get('number_value'),
+}
+
+def custom_field_value(field):
+    """Read a custom field's value according to its type"""
+    getter = CUSTOM_FIELD_VALUE_GETTERS.get(field.get('type'))
+    return getter(field) if getter else None
+
 def get_task_field_value(task, field_name):
     """Extract a field value from a task's custom fields"""
-    if 'custom_fields' not in task:
-        return None
-    
-    for field in task['custom_fields']:
-        if field['name'] == field_name:
-            if field['type'] == 'enum' and field.get('enum_value'):
-                return field['enum_value']['name']
-            elif field['type'] == 'text':
-                return field['text_value']
-            elif field['type'] == 'number':
-                return field['number_value']
-            else:
-                return None
+    for field in task.get('custom_fields') or ():
+        if field.get('name') == field_name:
+            return custom_field_value(field)
     return None
 
-def is_repair_form_task(task):
-    """Determine if a task is a repair form submission with a more flexible approach"""
-    logger.info(f"Checking if task {task.get('gid', 'unknown')} is a repair form task")
-    
-    # Log the task name to help with debugging
-    logger.info(f"Task name: {task.get('name', 'unknown')}")
-    
-    # First try to check for specific custom fields
-    if 'custom_fields' in task:
-        logger.info(f"Task has {len(task['custom_fields'])} custom fields")
-        
-        # Check if any field contains "category" or "urgency" in its name
-        has_category = False
-        has_urgency = False
-        
-        for field in task['custom_fields']:
-            field_name = field.get('name', '').lower()
-            logger.info(f"Field: {field.get('name')} - Type: {field.get('type')}")
-            
-            # Check for category field
-            if 'category' in field_name or 'issue' in field_name:
-                has_category = True
-                logger.info(f"Found category field: {field.get('name')}")
-            
-            # Check for urgency field
-            if 'urgency' in field_name or 'priority' in field_name:
-                has_urgency = True
-                logger.info(f"Found urgency field: {field.get('name')}")
-        
-        # If we found both category and urgency, it's likely a repair form
-        if has_category and has_urgency:
-            logger.info(f"Task {task.get('gid', 'unknown')} IS a repair form task (by field names)")
-            return True
-    
-    # Fall back to checking task name and description
-    task_name = task.get('name', '').lower()
-    task_notes = task.get('notes', '').lower()
-    
-    # Keywords that suggest this is a repair request
-    repair_keywords = ['repair', 'fix', 'broken', 'issue', 'not working', 'problem', 'maintenance']
-    
-    # Check if any repair keywords are in the task name or notes
-    for keyword in repair_keywords:
-        if keyword in task_name or keyword in task_notes:
-            logger.info(f"Task {task.get('gid', 'unknown')} IS a repair form task (by keywords)")
-            return True
-    
-    logger.info(f"Task {task.get('gid', 'unknown')} is NOT a repair form task")
-    return False
+def _read_custom_fields(task):
+    """Read the form values from a task's custom fields in one pass
 
-def extract_repair_details(task):
-    """Extract all relevant details from a repair request task with a more flexible approach"""
+    Returns the details found and whether the task carries both a category
+    and an urgency field, the signature of a repair form submission.
+    """
     details = {
         'first_name': None,
         'last_name': None,
@@ -170,55 +312,66 @@ def extract_repair_details(task):
         'specific_issue': None,
         'description': task.get('notes', '')
     }
+    has_category = False
+    has_urgency = False
+    # Checked once per task rather than paying a logger call per field
+    trace_fields = logger.isEnabledFor(logging.DEBUG)
+    
+    for field in task.get('custom_fields') or ():
+        field_name = field.get('name', '').lower()
+        if trace_fields:
+            logger.debug("Field: %s - Type: %s", field.get('name'), field.get('type'))
+        is_category = any(hint in field_name for hint in CATEGORY_FIELD_HINTS)
+        is_urgency = any(hint in field_name for hint in URGENCY_FIELD_HINTS)
+        has_category = has_category or is_category
+        has_urgency = has_urgency or is_urgency
+        
+        # Extract category
+        if is_category:
+            value = custom_field_value(field) if field.get('type') in ('enum', 'text') else None
+            # An empty field (e.g. an unset enum) must not overwrite a value already found
+            if value is not None:
+                details['issue_category'] = value
+        
+        # Extract urgency
+        elif is_urgency:
+            value = custom_field_value(field) if field.get('type') in ('enum', 'text') else None
+            # An empty field (e.g. an unset enum) must not overwrite a value already found
+            if value is not None:
+                details['urgency_level'] = value
+        
+        # Extract other fields
+        elif 'name' in field_name and not details['first_name']:
+            if field.get('type') == 'text':
+                name_parts = (custom_field_value(field) or '').split()
+                if name_parts:
+                    details['first_name'] = name_parts[0]
+                    if len(name_parts) > 1:
+                        details['last_name'] = ' '.join(name_parts[1:])
+        
+        elif 'email' in field_name and not details['email']:
+            if field.get('type') == 'text':
+                details['email'] = custom_field_value(field)
+        
+        elif 'phone' in field_name and not details['phone']:
+            if field.get('type') == 'text':
+                details['phone'] = custom_field_value(field)
+        
+        elif 'address' in field_name and not details['address']:
+            if field.get('type') == 'text':
+                details['address'] = custom_field_value(field)
+        
+        elif 'unit' in field_name and not details['unit_number']:
+            if field.get('type') == 'text':
+                details['unit_number'] = custom_field_value(field)
     
-    # Extract from task name and notes if available
+    return details, has_category and has_urgency
+
+def _apply_detail_defaults(task, details):
+    """Fill in fallback values for anything the custom fields did not provide"""
     task_name = task.get('name', '')
     task_notes = task.get('notes', '')
     
-    # Try to find information in custom fields
-    if 'custom_fields' in task:
-        for field in task['custom_fields']:
-            field_name = field.get('name', '').lower()
-            
-            # Extract category
-            if 'category' in field_name or 'issue' in field_name:
-                if field.get('type') == 'enum' and field.get('enum_value'):
-                    details['issue_category'] = field.get('enum_value').get('name')
-                elif field.get('type') == 'text':
-                    details['issue_category'] = field.get('text_value')
-            
-            # Extract urgency
-            elif 'urgency' in field_name or 'priority' in field_name:
-                if field.get('type') == 'enum' and field.get('enum_value'):
-                    details['urgency_level'] = field.get('enum_value').get('name')
-                elif field.get('type') == 'text':
-                    details['urgency_level'] = field.get('text_value')
-            
-            # Extract other fields
-            elif 'name' in field_name and not details['first_name']:
-                if field.get('type') == 'text':
-                    name_parts = field.get('text_value', '').split()
-                    if name_parts:
-                        details['first_name'] = name_parts[0]
-                        if len(name_parts) > 1:
-                            details['last_name'] = ' '.join(name_parts[1:])
-            
-            elif 'email' in field_name and not details['email']:
-                if field.get('type') == 'text':
-                    details['email'] = field.get('text_value')
-            
-            elif 'phone' in field_name and not details['phone']:
-                if field.get('type') == 'text':
-                    details['phone'] = field.get('text_value')
-            
-            elif 'address' in field_name and not details['address']:
-                if field.get('type') == 'text':
-                    details['address'] = field.get('text_value')
-            
-            elif 'unit' in field_name and not details['unit_number']:
-                if field.get('type') == 'text':
-                    details['unit_number'] = field.get('text_value')
-    
     # Set fallback values for missing fields
     if not details['issue_category']:
         # Try to determine category from task name or notes
@@ -245,24 +398,133 @@ def extract_repair_details(task):
     
     return details
 
-def create_subtasks(parent_task_gid, category):
-    """Create category-specific subtasks for the repair request"""
-    category_info = REPAIR_CATEGORIES.get(category, REPAIR_CATEGORIES['Other'])
-    subtasks_created = 0
+def classify_task(task):
+    """Return a task's repair details if it is a repair form submission, else None
+
+    Detection and extraction share a single pass over the custom fields.
+    """
+    task_gid = task.get('gid', 'unknown')
+    
+    # Form submissions are top-level tasks; subtasks are the checklist items
+    # this workflow creates, and their names would otherwise match the keywords
+    if task.get('parent'):
+        logger.info("Task %s is a subtask; skipping", task_gid)
+        return None
+    
+    details, has_form_fields = _read_custom_fields(task)
+    if has_form_fields:
+        logger.info("Task %s IS a repair form task (by field names)", task_gid)
+        return _apply_detail_defaults(task, details)
     
-    for subtype in category_info.get('subtypes', []):
+    # Fall back to checking task name and description
+    task_name = task.get('name', '').lower()
+    task_notes = task.get('notes', '').lower()
+    
+    # Check if any repair keywords are in the task name or notes
+    if REPAIR_KEYWORDS.search(task_name) or REPAIR_KEYWORDS.search(task_notes):
+        logger.info("Task %s IS a repair form task (by keywords)", task_gid)
+        return _apply_detail_defaults(task, details)
+    
+    logger.info("Task %s is NOT a repair form task", task_gid)
+    return None
+
+def is_repair_form_task(task):
+    """Determine if a task is a repair form submission with a more flexible approach"""
+    return classify_task(task) is not None
+
+def extract_repair_details(task):
+    """Extract all relevant details from a repair request task with a more flexible approach"""
+    return _apply_detail_defaults(task, _read_custom_fields(task)[0])
+
+def _run_action(action):
+    """Send one batch action as its own request, returning a batch-style result or None"""
+    try:
+        data = getattr(client, action['method'])(action['relative_path'], action['data'])
+    except Exception as e:
+        logger.error("Request %s %s failed: %s", action['method'].upper(), action['relative_path'], e)
+        return None
+    return {'status_code': 200, 'body': {'data': data}}
+
+def _submit_batch(actions):
+    """Run actions through /batch in chunks of ten, yielding each action with its result
+
+    If /batch is refused the chunk's actions are sent individually, in
+    parallel. A chunk that fails any other way yields None for each action.
+    """
+    for start in range(0, len(actions), BATCH_ACTION_LIMIT):
+        chunk = actions[start:start + BATCH_ACTION_LIMIT]
         try:
-            # Create subtask with proper fields
-            subtask = client.tasks.create_subtask_for_task(
-                parent_task_gid,
-                {'name': f"{category_info['emoji']} {subtype}",
-                 'projects': [SUBTASKS_PROJECT_ID]}
-            )
-            subtasks_created += 1
+            results = client.batch_api.create_batch_request({'actions': chunk})
+        except BATCH_REJECTED_ERRORS as e:
+            logger.warning("Batch request rejected (%s); sending %d actions individually", e, len(chunk))
+            with ThreadPoolExecutor(max_workers=len(chunk)) as pool:
+                results = list(pool.map(_run_action, chunk))
         except Exception as e:
-            logger.error(f"Failed to create subtask '{subtype}': {str(e)}")
+            logger.error("Batch request failed: %s", e)
+            results = [None] * len(chunk)
+        yield from zip(chunk, results)
+
+def _batch_succeeded(result):
+    return result is not None and result.get('status_code', 500) < 300
+
+def format_task_and_create_subtasks(task_gid, category, new_name=None):
+    """Rename the repair task and create its category subtasks in one batch
+
+    Returns (renamed, subtasks_created). With no new_name only the subtasks
+    are created, and renamed is True.
+    """
+    subtask_names = CATEGORY_SUBTASK_NAMES.get(category, CATEGORY_SUBTASK_NAMES['Other'])
+    actions = [{
+        'method': 'post',
+        'relative_path': f'/tasks/{task_gid}/subtasks',
+        'data': {'name': name, 'projects': [SUBTASKS_PROJECT_ID]}
+    } for name in subtask_names]
+    if new_name is not None:
+        actions.insert(0, {
+            'method': 'put',
+            'relative_path': f'/tasks/{task_gid}',
+            'data': {'name': new_name}
+        })
+    renamed = new_name is None
+    subtasks_created = 0
+    
+    # One batch request per ten actions instead of one round-trip each
+    for action, result in _submit_batch(actions):
+        if _batch_succeeded(result):
+            if action['method'] == 'put':
+                renamed = True
+            else:
+                subtasks_created += 1
+        elif action['method'] == 'put':
+            logger.error("Failed to rename task %s: %s", task_gid, result and result.get('body'))
+        else:
+            logger.error("Failed to create subtask '%s': %s", action['data']['name'], result and result.get('body'))
     
-    return subtasks_created > 0
+    return renamed, subtasks_created > 0
+
+def create_subtasks(parent_task_gid, category):
+    """Create category-specific subtasks for the repair request"""
+    return format_task_and_create_subtasks(parent_task_gid, category)[1]
+
+# Notification subject and body, parsed once; only the per-request values are
+# filled in. Tenant-supplied values are HTML-escaped when the body renders.
+EMAIL_TEMPLATE_ENV = jinja2.Environment(autoescape=True)
+EMAIL_SUBJECT_TMPL = Template("New Repair Request: $issue_category - $address")
+EMAIL_BODY_TMPL = EMAIL_TEMPLATE_ENV.from_string("""
+        <html>
+        <body style="font-family: Arial, sans-serif; line-height: 1.6;">
+            <h2>New Property Repair Request</h2>
+            <p><strong>Tenant:</strong> {{ first_name }} {{ last_name }}</p>
+            <p><strong>Contact:</strong> {{ email }} | {{ phone }}</p>
+            <p><strong>Property:</strong> {{ address }}, Unit {{ unit_number }}</p>
+            <p><strong>Urgency Level:</strong> {{ urgency_level }}</p>
+            <p><strong>Issue Category:</strong> {{ issue_category }}</p>
+            <p><strong>Specific Issue:</strong> {{ specific_issue }}</p>
+            <p><strong>Description:</strong><br>{{ description }}</p>
+            <p><a href="https://app.asana.com/0/0/{{ task_gid }}" style="background-color: #796eff; color: white; padding: 10px 15px; text-decoration: none; border-radius: 4px;">View Task in Asana</a></p>
+        </body>
+        </html>
+        """)
 
 def send_email_notification(repair_details, task_gid):
     """Send email notification about the new repair request"""
@@ -272,89 +534,212 @@ def send_email_notification(repair_details, task_gid):
     
     try:
         # Create message
-        message = MIMEMultipart()
+        message = EmailMessage()
         message['From'] = EMAIL_CONFIG['user']
         message['To'] = EMAIL_CONFIG['distribution_list']
-        message['Subject'] = f"New Repair Request: {repair_details.get('issue_category', 'Maintenance')} - {repair_details.get('address', 'Property')}"
+        message['Subject'] = EMAIL_SUBJECT_TMPL.substitute(
+            issue_category=repair_details.get('issue_category', 'Maintenance'),
+            address=repair_details.get('address', 'Property')
+        )
         
         # Construct email body
-        body = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6;">
-            <h2>New Property Repair Request</h2>
-            <p><strong>Tenant:</strong> {repair_details.get('first_name', '')} {repair_details.get('last_name', '')}</p>
-            <p><strong>Contact:</strong> {repair_details.get('email', '')} | {repair_details.get('phone', '')}</p>
-            <p><strong>Property:</strong> {repair_details.get('address', '')}, Unit {repair_details.get('unit_number', 'N/A')}</p>
-            <p><strong>Urgency Level:</strong> {repair_details.get('urgency_level', 'Standard')}</p>
-            <p><strong>Issue Category:</strong> {repair_details.get('issue_category', 'Other')}</p>
-            <p><strong>Specific Issue:</strong> {repair_details.get('specific_issue', 'N/A')}</p>
-            <p><strong>Description:</strong><br>{repair_details.get('description', 'No additional details provided.')}</p>
-            <p><a href="https://app.asana.com/0/0/{task_gid}" style="background-color: #796eff; color: white; padding: 10px 15px; text-decoration: none; border-radius: 4px;">View Task in Asana</a></p>
-        </body>
-        </html>
-        """
+        body = EMAIL_BODY_TMPL.render(
+            first_name=repair_details.get('first_name', ''),
+            last_name=repair_details.get('last_name', ''),
+            email=repair_details.get('email', ''),
+            phone=repair_details.get('phone', ''),
+            address=repair_details.get('address', ''),
+            unit_number=repair_details.get('unit_number', 'N/A'),
+            urgency_level=repair_details.get('urgency_level', 'Standard'),
+            issue_category=repair_details.get('issue_category', 'Other'),
+            specific_issue=repair_details.get('specific_issue', 'N/A'),
+            description=repair_details.get('description', 'No additional details provided.'),
+            task_gid=task_gid
+        )
         
-        message.attach(MIMEText(body, 'html'))
+        message.set_content(body, subtype='html')
         
-        # Connect to server and send
-        server = smtplib.SMTP(EMAIL_CONFIG['server'], EMAIL_CONFIG['port'])
-        server.starttls()
-        server.login(EMAIL_CONFIG['user'], EMAIL_CONFIG['password'])
-        server.send_message(message)
-        server.quit()
+        # Send over the shared connection, skipping TLS and AUTH when it is still open
+        smtp_pool.send(message)
         
-        logger.info(f"Email notification sent for task {task_gid}")
+        logger.info("Email notification sent for task %s", task_gid)
         return True
     
     except Exception as e:
-        logger.error(f"Failed to send email notification: {str(e)}")
+        logger.error("Failed to send email notification: %s", e)
         return False
 
-def process_repair_request(task):
-    """Process a repair request task from start to finish"""
+class SMTPPool:
+    """A few authenticated SMTP connections shared by every send, reopened when they drop"""
+
+    # Relays commonly cap messages per session, so retire a connection before that
+    MAX_MESSAGES_PER_CONNECTION = 100
+
+    def __init__(self, config, size):
+        self._config = config
+        # Idle (connection, messages sent) pairs, most recently used first so
+        # the warmest is reused
+        self._idle = queue.LifoQueue()
+        # At most `size` connections are open or in use at once
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self):
+        conn = smtplib.SMTP(self._config['server'], self._config['port'], timeout=30)
+        try:
+            conn.starttls()
+            conn.login(self._config['user'], self._config['password'])
+        except Exception:
+            self._quit(conn)
+            raise
+        return conn
+
+    @staticmethod
+    def _quit(conn):
+        try:
+            conn.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+
+    @staticmethod
+    def _alive(conn):
+        try:
+            return conn.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _send_or_quit(self, conn, message):
+        """Send on conn, quitting it if the send fails so it is never leaked"""
+        try:
+            conn.send_message(message)
+        except Exception:
+            # Don't return a connection in an unknown state to the pool
+            self._quit(conn)
+            raise
+
+    def close(self):
+        """Quit every idle connection"""
+        while True:
+            try:
+                self._quit(self._idle.get_nowait()[0])
+            except queue.Empty:
+                return
+
+    def send(self, message):
+        """Send a message on a pooled connection, reusing it if the server still answers NOOP"""
+        with self._slots:
+            try:
+                conn, sent = self._idle.get_nowait()
+            except queue.Empty:
+                conn, sent = None, 0
+            if conn is not None and not self._alive(conn):
+                self._quit(conn)
+                conn = None
+            if conn is None:
+                conn, sent = self._connect(), 0
+            try:
+                self._send_or_quit(conn, message)
+            except smtplib.SMTPServerDisconnected:
+                # Idle connections get dropped between the NOOP and the send; retry once
+                conn, sent = self._connect(), 0
+                self._send_or_quit(conn, message)
+            sent += 1
+            if sent >= self.MAX_MESSAGES_PER_CONNECTION:
+                self._quit(conn)
+            else:
+                self._idle.put((conn, sent))
+
+# One pooled connection per email worker, so concurrent sends never queue on SMTP
+EMAIL_WORKERS = 4
+smtp_pool = SMTPPool(EMAIL_CONFIG, size=EMAIL_WORKERS)
+atexit.register(smtp_pool.close)
+
+# SMTP handshakes take seconds over TLS, so sends run on their own small pool
+# instead of holding up the caller
+EMAIL_EXECUTOR = ThreadPoolExecutor(max_workers=EMAIL_WORKERS, thread_name_prefix='email')
+
+def queue_email_notification(repair_details, task_gid):
+    """Send the notification email in the background; returns a Future of the result"""
+    return EMAIL_EXECUTOR.submit(send_email_notification, repair_details, task_gid)
+
+# Tasks this process has claimed or finished in the last hour. Webhook
+# redeliveries, /process-task and /process-recent can all reach the same task;
+# only the first gets past this, so subtasks and email are never doubled.
+PROCESSED_TASKS = TTLCache(maxsize=10000, ttl=3600)
+PROCESSED_TASKS_LOCK = threading.Lock()
+
+def process_repair_request(task, repair_details=None):
+    """Process a repair request task from start to finish
+
+    Callers that have already classified the task with classify_task pass its
+    details along so the custom fields are not read a second time.
+
+    Returns True once the task has been processed, False if processing failed,
+    or None if another run in this process is still working on it.
+    """
     task_gid = task['gid']
-    logger.info(f"Processing repair request task: {task_gid}")
+    with PROCESSED_TASKS_LOCK:
+        if task_gid in PROCESSED_TASKS:
+            if PROCESSED_TASKS[task_gid]:
+                logger.info("Task %s already handled by this process. Skipping.", task_gid)
+                return True
+            logger.info("Task %s is being handled by another run. Skipping.", task_gid)
+            return None
+        # Claimed but not finished until marked True below
+        PROCESSED_TASKS[task_gid] = False
+    logger.info("Processing repair request task: %s", task_gid)
     
     try:
-        # Check if task has already been processed
-        for story in client.stories.find_by_task(task_gid):
+        # Check if task has already been processed. Only the story text is
+        # needed, so project to it and pull the history in full-size pages.
+        for story in client.stories.find_by_task(task_gid, {'opt_fields': 'text'}, page_size=100):
             if "Repair request processed" in story.get('text', ''):
-                logger.info(f"Task {task_gid} already processed. Skipping.")
+                logger.info("Task %s already processed. Skipping.", task_gid)
+                with PROCESSED_TASKS_LOCK:
+                    PROCESSED_TASKS[task_gid] = True
                 return True
         
         # Extract repair details
-        repair_details = extract_repair_details(task)
+        if repair_details is None:
+            repair_details = extract_repair_details(task)
         
         # Update task with formatting and category icon
         category = repair_details.get('issue_category', 'Other')
-        category_info = REPAIR_CATEGORIES.get(category, REPAIR_CATEGORIES['Other'])
+        emoji = CATEGORY_EMOJI.get(category, CATEGORY_EMOJI['Other'])
         
         # Update the task name with emoji and improve formatting
-        updated_name = f"{category_info['emoji']} {repair_details.get('issue_category', 'Repair')} - {repair_details.get('address', 'Property')}"
-        
-        client.tasks.update(task_gid, {
-            'name': updated_name
-        })
+        updated_name = f"{emoji} {repair_details.get('issue_category', 'Repair')} - {repair_details.get('address', 'Property')}"
         
-        # Create subtasks based on category
-        subtask_result = create_subtasks(task_gid, category)
+        # Send email notification while the task is being updated
+        email_future = queue_email_notification(repair_details, task_gid)
         
-        # Send email notification
-        email_result = send_email_notification(repair_details, task_gid)
+        # Rename the task and create subtasks based on category in one batch.
+        # A task renamed on an earlier, interrupted run needs no second write.
+        format_result, subtask_result = format_task_and_create_subtasks(
+            task_gid,
+            category,
+            updated_name if task.get('name') != updated_name else None
+        )
+        email_result = email_future.result()
+        invalidate_task(task_gid)
         
         # Add comment to track processing
         client.stories.create_on_task(task_gid, {
             'text': "Repair request processed by system:\n"
-                    f"✅ Task formatted\n"
+                    f"{'✅' if format_result else '❌'} Task formatted\n"
                     f"{'✅' if subtask_result else '❌'} Category-specific subtasks created\n"
                     f"{'✅' if email_result else '❌'} Notification email sent"
         })
         
-        logger.info(f"Successfully processed repair request {task_gid}")
+        logger.info("Successfully processed repair request %s", task_gid)
+        with PROCESSED_TASKS_LOCK:
+            PROCESSED_TASKS[task_gid] = True
         return True
         
     except Exception as e:
-        logger.error(f"Failed to process repair task {task_gid}: {str(e)}")
+        logger.error("Failed to process repair task %s: %s", task_gid, e)
+        # Release the claim so a later delivery or scan can retry it
+        with PROCESSED_TASKS_LOCK:
+            PROCESSED_TASKS.pop(task_gid, None)
         # Try to add error note to task
         try:
             client.stories.create_on_task(task_gid, {
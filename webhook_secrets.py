@@ -0,0 +1,62 @@
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from cachetools import TTLCache
+
+# SQLite file shared by every worker process on the host, so a handshake
+# answered by one worker can be verified by the others and survives restarts
+SECRETS_DB = os.environ.get('WEBHOOK_SECRETS_DB', 'webhook_secrets.db')
+
+# Short-lived cache in front of the database keeps disk reads off the hot path
+_cache = TTLCache(maxsize=64, ttl=60)
+_cache_lock = threading.Lock()
+
+def _connect():
+    """Open a connection to the secrets database, creating the table if needed"""
+    conn = sqlite3.connect(SECRETS_DB, timeout=5)
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS webhook_secrets '
+        '(resource TEXT PRIMARY KEY, secret TEXT NOT NULL)'
+    )
+    return conn
+
+def set_secret(resource, secret):
+    """Persist the handshake secret for the webhook watching a resource"""
+    with closing(_connect()) as conn, conn:
+        conn.execute(
+            'INSERT OR REPLACE INTO webhook_secrets (resource, secret) VALUES (?, ?)',
+            (resource, secret)
+        )
+    with _cache_lock:
+        _cache[resource] = secret
+
+def add_secret(resource, secret):
+    """Persist a handshake secret only if none is stored yet; returns True if it was saved"""
+    with closing(_connect()) as conn, conn:
+        saved = conn.execute(
+            'INSERT OR IGNORE INTO webhook_secrets (resource, secret) VALUES (?, ?)',
+            (resource, secret)
+        ).rowcount == 1
+    if saved:
+        with _cache_lock:
+            _cache[resource] = secret
+    return saved
+
+def get_secret(resource):
+    """Look up the handshake secret for a resource, or None if unknown"""
+    with _cache_lock:
+        secret = _cache.get(resource)
+    if secret is not None:
+        return secret
+
+    with closing(_connect()) as conn:
+        row = conn.execute(
+            'SELECT secret FROM webhook_secrets WHERE resource = ?', (resource,)
+        ).fetchone()
+    if row is None:
+        return None
+
+    with _cache_lock:
+        _cache[resource] = row[0]
+    return row[0]